@@ -1,11 +1,18 @@
 # mls_app.py - Full Flask prototype with Google Sheets symbol export
-from flask import Flask, request, jsonify, render_template_string, redirect, url_for, send_file
+from flask import Flask, request, jsonify, render_template_string, redirect, url_for, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, text, bindparam, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from datetime import datetime
-import csv, io, os, base64, json
+import csv, io, os, base64, gzip, json, sqlite3, itertools, threading
+from collections import OrderedDict
 
 # Optional libs for Sheets; app will still run if they're not installed
 try:
+    import numpy as np
     import pandas as pd
     import gspread
     from gspread_dataframe import set_with_dataframe
@@ -17,10 +24,64 @@ except Exception:
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///mls_cleanup.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # local file: no network to ping; share connections across request threads and wait out write locks
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': False,
+        'insertmanyvalues_page_size': 10000,
+        'connect_args': {'check_same_thread': False, 'timeout': 30},
+    }
+else:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_recycle': 1800,
+        'insertmanyvalues_page_size': 10000,
+    }
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the import/bulk writers; NORMAL sync drops the per-commit fsync
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+# rows written per chunk when streaming the CSV export
+EXPORT_CHUNK_ROWS = 1000
+# rows inserted per transaction when importing observations from CSV
+IMPORT_CHUNK_ROWS = 5000
+
+# in-process cache of /api/batches/<batch>/summary responses: batch -> (version, json bytes).
+# Writes bump the batch's version (or ALL_BATCHES_VERSION when every batch is touched),
+# so a cached entry is only served while no write has landed since it was computed.
+# This assumes add_listing, import_obs and bulk_mark_empty are the only writers to
+# listing/observation; anything else writing those tables must call bump_batch_version().
+# Empty results are not cached and the oldest entry is evicted past SUMMARY_CACHE_MAX,
+# so requests for arbitrary batch names cannot grow the cache without bound.
+SUMMARY_CACHE = OrderedDict()
+SUMMARY_CACHE_MAX = 256
+SUMMARY_CACHE_LOCK = threading.Lock()  # the dev server is threaded
+BATCH_VERSION = {}
+ALL_BATCHES_VERSION = 0
+_version_counter = itertools.count(1)
+
+# lookups for per-row encoding of Observation.filled; None means the listing was never checked
+SYMBOL = {True: '✔️', False: '✖️'}
+UNCHECKED_SYMBOL = '—'
+BOOLINT = {True: 1, False: 0}
+STATUS = {True: 'filled', False: 'empty', None: 'unchecked'}
+
 # --- Models ---
 class Listing(db.Model):
+    __table_args__ = (db.Index('ix_listing_batch', 'batch'),)
     id = db.Column(db.Integer, primary_key=True)
     batch = db.Column(db.String(120), default='default')
     listing_id_text = db.Column(db.String(120), nullable=False)
@@ -31,7 +92,15 @@ class Field(db.Model):
     canonical = db.Column(db.String(200), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# case-insensitive prefix search for the autocomplete
+db.Index('ix_field_canonical_lower', db.func.lower(Field.canonical))
+
 class Observation(db.Model):
+    # filled is trailing so lookups by (field, listing) pair are index-only
+    __table_args__ = (
+        db.Index('ix_obs_field_listing', 'field_id', 'listing_id', 'filled'),
+        db.Index('ix_obs_listing_field', 'listing_id', 'field_id', 'filled'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False)
     field_id = db.Column(db.Integer, db.ForeignKey('field.id'), nullable=False)
@@ -42,19 +111,86 @@ class Observation(db.Model):
 
 def create_tables():
     db.create_all()
+    # create_all skips tables that already exist, so add any missing indexes explicitly
+    # (not checkfirst: reflection does not report expression indexes)
+    indexes = [idx for model in (Listing, Field, Observation) for idx in model.__table__.indexes]
+    if db.engine.dialect.name in ('sqlite', 'postgresql'):
+        with db.engine.begin() as conn:
+            for idx in indexes:
+                conn.execute(CreateIndex(idx, if_not_exists=True))
+        return
+    # e.g. MySQL has no CREATE INDEX IF NOT EXISTS: create each one and skip those already there
+    for idx in indexes:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(CreateIndex(idx))
+        except DBAPIError as e:
+            if 'already exists' not in str(e) and 'Duplicate key name' not in str(e):
+                raise
 
 # --- Helpers ---
+def bump_batch_version(batch=None):
+    """Invalidate cached summaries for `batch`, or for every batch when None."""
+    global ALL_BATCHES_VERSION
+    if batch is None:
+        ALL_BATCHES_VERSION = next(_version_counter)
+    else:
+        BATCH_VERSION[batch] = next(_version_counter)
+
+def batch_version(batch):
+    return max(ALL_BATCHES_VERSION, BATCH_VERSION.get(batch, 0))
+
+def field_insert_ignore():
+    """INSERT into field that skips names already present, or None if the dialect has no such form."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(Field).on_conflict_do_nothing(index_elements=['canonical'])
+    if dialect == 'postgresql':
+        return postgresql.insert(Field).on_conflict_do_nothing(index_elements=['canonical'])
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(Field).prefix_with('IGNORE')
+    return None
+
 def find_or_create_field(name):
     name = name.strip()
     if not name:
         return None
-    f = Field.query.filter_by(canonical=name).first()
-    if f:
-        return f
-    f = Field(canonical=name)
-    db.session.add(f)
-    db.session.commit()
-    return f
+    return db.session.get(Field, resolve_field_ids([name])[name])
+
+def resolve_field_ids(names):
+    """Map each canonical name to its Field id, inserting any missing fields in one batch."""
+    names = list(dict.fromkeys(names))  # dedupe but keep first-seen order so created_at follows input order
+    if not names:
+        return {}
+    def lookup(wanted):
+        return db.session.query(Field.canonical, Field.id).filter(Field.canonical.in_(wanted)).all()
+    stmt = field_insert_ignore()
+    if stmt is not None:
+        db.session.execute(stmt, [{'canonical': n} for n in names])
+        return dict(lookup(names))
+    # no insert-or-ignore on this dialect: only insert the names that are not there yet
+    ids = dict(lookup(names))
+    missing = [n for n in names if n not in ids]
+    if missing:
+        db.session.execute(Field.__table__.insert(), [{'canonical': n} for n in missing])
+        ids.update(lookup(missing))
+    return ids
+
+def resolve_listing_ids(batch, texts):
+    """Map each listing text in `batch` to its Listing id, inserting any missing listings in one batch."""
+    texts = list(dict.fromkeys(texts))  # dedupe but keep first-seen order so created_at follows input order
+    if not texts:
+        return {}
+    def lookup(wanted):
+        # id DESC so dict() keeps the oldest listing when a batch repeats a listing_id_text
+        return db.session.query(Listing.listing_id_text, Listing.id).filter(
+            Listing.batch==batch, Listing.listing_id_text.in_(wanted)).order_by(Listing.id.desc()).all()
+    ids = dict(lookup(texts))
+    missing = [t for t in texts if t not in ids]
+    if missing:
+        db.session.execute(Listing.__table__.insert(), [{'batch': batch, 'listing_id_text': t} for t in missing])
+        ids.update(lookup(missing))
+    return ids
 
 # --- Routes / API ---
 @app.route('/')
@@ -65,9 +201,16 @@ def index():
 def api_fields():
     q = request.args.get('q','').strip()
     if q:
-        results = Field.query.filter(Field.canonical.ilike(f'%{q}%')).limit(20).all()
+        # prefix range over lower(canonical) so the expression index is used;
+        # fall back to a substring scan only when nothing starts with q
+        lo = q.lower()
+        hi = lo[:-1] + chr(ord(lo[-1]) + 1)
+        canonical_lower = db.func.lower(Field.canonical)
+        results = Field.query.filter(canonical_lower >= lo, canonical_lower < hi).order_by(canonical_lower).limit(20).all()
+        if not results:
+            results = Field.query.filter(Field.canonical.ilike(f'%{q}%')).limit(20).all()
     else:
-        results = Field.query.order_by(Field.created_at.desc()).limit(50).all()
+        results = Field.query.order_by(Field.created_at.desc(), Field.id.desc()).limit(50).all()
     return jsonify([{'id':f.id,'canonical':f.canonical} for f in results])
 
 @app.route('/api/batches/<batch>/listings', methods=['POST'])
@@ -80,80 +223,114 @@ def add_listing(batch):
         return jsonify({'error':'listing_id required'}), 400
     lst = Listing(batch=batch, listing_id_text=listing_text)
     db.session.add(lst)
-    db.session.commit()
+    db.session.flush()  # assigns lst.id without ending the transaction
+    pending = []
     for obs in observations:
         raw = (obs.get('field_text') or '').strip()
-        if not raw:
-            continue
-        fld = Field.query.filter_by(canonical=raw).first()
-        if not fld:
-            fld = Field(canonical=raw)
-            db.session.add(fld); db.session.commit()
-        ob = Observation(listing_id=lst.id, field_id=fld.id, filled=bool(obs.get('filled',False)),
-                         raw_text=raw, analyst=analyst)
-        db.session.add(ob)
+        if raw:
+            pending.append((raw, bool(obs.get('filled',False))))
+    field_ids = resolve_field_ids(raw for raw, _ in pending)
+    listing_db_id = lst.id
+    obs_rows = [{'listing_id':listing_db_id, 'field_id':field_ids[raw], 'filled':filled, 'raw_text':raw, 'analyst':analyst}
+                for raw, filled in pending]
+    if obs_rows:
+        db.session.execute(Observation.__table__.insert(), obs_rows)
     db.session.commit()
-    return jsonify({'status':'ok','listing_db_id':lst.id})
+    bump_batch_version(batch)
+    return jsonify({'status':'ok','listing_db_id':listing_db_id})
 
 @app.route('/api/batches/<batch>/summary')
 def batch_summary(batch):
-    sql = '''SELECT f.id, f.canonical,
-             SUM(CASE WHEN o.filled=1 THEN 1 ELSE 0 END) as filled_count,
-             SUM(CASE WHEN o.filled=0 THEN 1 ELSE 0 END) as empty_count,
-             COUNT(o.id) as sample_count
-             FROM field f JOIN observation o ON f.id=o.field_id
-             JOIN listing l on o.listing_id=l.id
+    version = batch_version(batch)
+    with SUMMARY_CACHE_LOCK:
+        cached = SUMMARY_CACHE.get(batch)
+    if cached and cached[0] == version:
+        return Response(cached[1], mimetype='application/json')
+    sql = '''SELECT f.id AS field_id, f.canonical,
+             SUM(CASE WHEN o.filled THEN 1 ELSE 0 END) AS filled,
+             COUNT(*) - SUM(CASE WHEN o.filled THEN 1 ELSE 0 END) AS empty,
+             COUNT(*) AS sample
+             FROM observation o JOIN field f ON f.id=o.field_id
+             JOIN listing l ON l.id=o.listing_id
              WHERE l.batch = :batch
-             GROUP BY f.id
-             ORDER BY sample_count DESC
+             GROUP BY f.id, f.canonical
+             ORDER BY sample DESC
           '''
-    res = db.session.execute(sql, {'batch':batch}).fetchall()
-    out = []
-    for r in res:
-        out.append({'field_id':r[0],'canonical':r[1],'filled':int(r[2]),'empty':int(r[3]),'sample':int(r[4])})
-    return jsonify(out)
+    # int() because SUM comes back as Decimal on some backends (MySQL), which json.dumps rejects
+    out = [{'field_id':r['field_id'], 'canonical':r['canonical'], 'filled':int(r['filled']),
+            'empty':int(r['empty']), 'sample':int(r['sample'])}
+           for r in db.session.execute(text(sql), {'batch':batch}).mappings()]
+    body = json.dumps(out).encode()
+    if out:
+        with SUMMARY_CACHE_LOCK:
+            SUMMARY_CACHE.pop(batch, None)
+            if len(SUMMARY_CACHE) >= SUMMARY_CACHE_MAX:
+                SUMMARY_CACHE.popitem(last=False)
+            SUMMARY_CACHE[batch] = (version, body)
+    return Response(body, mimetype='application/json')
 
 @app.route('/field/<int:field_id>')
 def field_detail(field_id):
     fld = Field.query.get_or_404(field_id)
-    listings = Listing.query.order_by(Listing.created_at.desc()).all()
+    # one LEFT OUTER JOIN instead of a lookup per listing; the subquery keeps only the
+    # oldest observation per listing so duplicates still render as a single row
+    first_obs = db.session.query(Observation.listing_id, db.func.min(Observation.id).label('obs_id')).filter(
+        Observation.field_id==field_id
+    ).group_by(Observation.listing_id).subquery()
+    res = db.session.query(Listing.listing_id_text, Observation.id, Observation.filled).outerjoin(
+        first_obs, first_obs.c.listing_id==Listing.id
+    ).outerjoin(
+        Observation, Observation.id==first_obs.c.obs_id
+    ).order_by(Listing.created_at.desc(), Listing.id.desc()).all()
     rows = []
-    for l in listings:
-        obs = Observation.query.filter_by(listing_id=l.id, field_id=field_id).first()
-        if obs:
-            status = 'filled' if obs.filled else 'empty'
-        else:
-            status = 'unchecked'
-        rows.append({'listing_id_text': l.listing_id_text, 'status': status, 'obs_id': obs.id if obs else None})
+    for listing_text, obs_id, filled in res:
+        rows.append({'listing_id_text': listing_text, 'status': STATUS[filled], 'obs_id': obs_id})
     return render_template_string(FIELD_HTML, field=fld, rows=rows)
 
 @app.route('/field/<int:field_id>/bulk_mark_empty', methods=['POST'])
 def bulk_mark_empty(field_id):
     analyst = request.form.get('analyst','bulk_user')
     fld = Field.query.get_or_404(field_id)
-    listings = Listing.query.all()
-    count = 0
-    for l in listings:
-        obs = Observation.query.filter_by(listing_id=l.id, field_id=field_id).first()
-        if not obs:
-            ob = Observation(listing_id=l.id, field_id=field_id, filled=False, raw_text=fld.canonical, analyst=analyst)
-            db.session.add(ob)
-            count += 1
+    # write every missing observation in one INSERT ... SELECT
+    sql = text('''INSERT INTO observation (listing_id, field_id, filled, raw_text, analyst, checked_at)
+             SELECT l.id, :fid, :filled, :raw, :analyst, :now
+             FROM listing l LEFT JOIN observation o ON o.listing_id=l.id AND o.field_id=:fid
+             WHERE o.id IS NULL
+          ''').bindparams(bindparam('filled', False, type_=db.Boolean), bindparam('now', type_=db.DateTime))
+    db.session.execute(sql, {'fid':field_id, 'raw':fld.canonical, 'analyst':analyst, 'now':datetime.utcnow()})
     db.session.commit()
+    bump_batch_version()  # listings from every batch may have gained an observation
     return redirect(url_for('field_detail', field_id=field_id))
 
 @app.route('/export/observations.csv')
 def export_observations():
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['listing_id','field','filled','analyst','checked_at'])
-    obs = Observation.query.join(Listing, Observation.listing_id==Listing.id).join(Field, Observation.field_id==Field.id).add_columns(Listing.listing_id_text, Field.canonical, Observation.filled, Observation.analyst, Observation.checked_at).all()
-    for o in obs:
-        cw.writerow([o[1], o[2], int(o[3]), o[4], o[5].isoformat()])
-    output = io.BytesIO()
-    output.write(si.getvalue().encode())
-    output.seek(0)
-    return send_file(output, mimetype='text/csv', download_name='observations.csv', as_attachment=True)
+    def generate():
+        si = io.StringIO()
+        cw = csv.writer(si)
+        cw.writerow(['listing_id','field','filled','analyst','checked_at'])
+        stmt = select(Listing.listing_id_text, Field.canonical, Observation.filled, Observation.analyst, Observation.checked_at).select_from(Observation).join(Listing, Observation.listing_id==Listing.id).join(Field, Observation.field_id==Field.id).execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS)
+        for i, (listing_text, canonical, filled, analyst, checked_at) in enumerate(db.session.execute(stmt), start=1):
+            cw.writerow((listing_text, canonical, BOOLINT[filled], analyst, checked_at.isoformat()))
+            if i % EXPORT_CHUNK_ROWS == 0:
+                yield si.getvalue()
+                si.seek(0); si.truncate(0)
+        yield si.getvalue()
+
+    def generate_gz():
+        # compresslevel=1: the wire, not the CPU, is the bottleneck for large exports
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=1) as gz:
+            for chunk in generate():
+                gz.write(chunk.encode())
+                yield buf.getvalue()
+                buf.seek(0); buf.truncate(0)
+        yield buf.getvalue()
+
+    headers = {'Content-Disposition':'attachment; filename=observations.csv', 'Vary':'Accept-Encoding'}
+    if request.accept_encodings['gzip'] > 0:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(stream_with_context(generate_gz()), mimetype='text/csv', headers=headers)
+    return Response(stream_with_context(generate()), mimetype='text/csv', headers=headers)
 
 @app.route('/import/observations', methods=['GET','POST'])
 def import_obs():
@@ -164,25 +341,39 @@ def import_obs():
     analyst = request.form.get('analyst','import_user')
     if not f:
         return "no file", 400
-    text = f.read().decode()
-    reader = csv.DictReader(io.StringIO(text))
+    reader = csv.DictReader(io.StringIO(f.read().decode()))
+    # known ids up front; chunks only go to the database for names not seen yet
+    # id DESC so dict() keeps the oldest listing when a batch repeats a listing_id_text
+    listing_ids = dict(db.session.execute(
+        select(Listing.listing_id_text, Listing.id).where(Listing.batch==batch).order_by(Listing.id.desc())).all())
+    field_ids = dict(db.session.execute(select(Field.canonical, Field.id)).all())
+
+    def flush(chunk):
+        new_listings = [l for l in dict.fromkeys(l for l, _, _ in chunk) if l not in listing_ids]
+        if new_listings:
+            listing_ids.update(resolve_listing_ids(batch, new_listings))
+        new_fields = [fn for fn in dict.fromkeys(fn for _, fn, _ in chunk) if fn not in field_ids]
+        if new_fields:
+            field_ids.update(resolve_field_ids(new_fields))
+        obs_rows = [{'listing_id':listing_ids[l], 'field_id':field_ids[fn], 'filled':filled,
+                     'raw_text':fn, 'analyst':analyst} for l, fn, filled in chunk]
+        db.session.execute(Observation.__table__.insert(), obs_rows)
+        db.session.commit()
+        bump_batch_version(batch)
+
+    chunk = []
     for row in reader:
         listing_text = row.get('listing_id','').strip()
         field_name = row.get('field','').strip()
         filled = bool(int(row.get('filled','0')))
         if not listing_text or not field_name:
             continue
-        lst = Listing.query.filter_by(listing_id_text=listing_text, batch=batch).first()
-        if not lst:
-            lst = Listing(batch=batch, listing_id_text=listing_text)
-            db.session.add(lst); db.session.commit()
-        fld = Field.query.filter_by(canonical=field_name).first()
-        if not fld:
-            fld = Field(canonical=field_name)
-            db.session.add(fld); db.session.commit()
-        obs = Observation(listing_id=lst.id, field_id=fld.id, filled=filled, raw_text=field_name, analyst=analyst)
-        db.session.add(obs)
-    db.session.commit()
+        chunk.append((listing_text, field_name, filled))
+        if len(chunk) >= IMPORT_CHUNK_ROWS:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
     return "imported", 200
 
 # Google Sheets helper functions (optional)
@@ -204,7 +395,10 @@ def get_gspread_client():
     return client
 
 def build_listing_order(batch='default'):
-    listings = Listing.query.filter_by(batch=batch).order_by(Listing.created_at.asc()).all()
+    """Return (id, listing_id_text) tuples for the batch in entry order."""
+    listings = db.session.execute(
+        select(Listing.id, Listing.listing_id_text).where(Listing.batch==batch).order_by(Listing.created_at.asc(), Listing.id.asc())
+    ).all()
     return listings
 
 @app.route('/export/google_sheet_symbols')
@@ -227,55 +421,29 @@ def export_google_sheet_symbols():
     if not listings:
         return f"No listings found for batch '{batch}'.", 400
 
-    listing_headers = []
-    for i, l in enumerate(listings, start=1):
-        header = f"L{i} - {l.listing_id_text}"
-        listing_headers.append(header)
+    listing_ids = [lid for lid, _ in listings]
+    listing_headers = [f"L{i} - {listing_text}" for i, (_, listing_text) in enumerate(listings, start=1)]
 
     fields = Field.query.order_by(Field.canonical.asc()).all()
     if not fields:
         return "No fields found.", 400
 
-    header_row = ['Field Name'] + listing_headers + ['Filled Count', 'Empty Count', '% Empty', 'Remove? (≥6)']
-
-    rows = []
-    # build obs map
-    obs_q = Observation.query.all()
-    obs_map = {(o.field_id, o.listing_id): o for o in obs_q}
-
-    for field in fields:
-        row = [field.canonical]
-        for l in listings:
-            key = (field.id, l.id)
-            obs = obs_map.get(key)
-            if obs is None:
-                symbol = '—'
-            else:
-                symbol = '✔️' if obs.filled else '✖️'
-            row.append(symbol)
-        rows.append(row)
-
-    try:
-        try:
-            ws = sh.worksheet('Single Family')
-            sh.del_worksheet(ws)
-        except Exception:
-            pass
-        num_rows = max(100, len(rows) + 10)
-        num_cols = len(header_row)
-        ws = sh.add_worksheet(title='Single Family', rows=str(num_rows), cols=str(num_cols))
-    except Exception as e:
-        return f"sheet creation error: {e}", 500
-
-    try:
-        ws.update('A1', [header_row])
-    except Exception as e:
-        return f"error writing header: {e}", 500
-
-    try:
-        ws.update('A2', rows)
-    except Exception as e:
-        return f"error writing rows: {e}", 500
+    summary_headers = ['Filled Count', 'Empty Count', '% Empty', 'Remove? (≥6)']
+    num_cols = 1 + len(listing_headers) + len(summary_headers)
+
+    # symbol matrix: one row per field, one column per listing, filled in with numpy fancy indexing
+    field_pos = {f.id: i for i, f in enumerate(fields)}
+    listing_pos = {lid: j for j, lid in enumerate(listing_ids)}
+    obs_q = db.session.execute(
+        select(Observation.field_id, Observation.listing_id, Observation.filled)
+        .join(Listing, Observation.listing_id==Listing.id).where(Listing.batch==batch)
+    ).all()
+    matrix = np.full((len(fields), len(listing_ids)), UNCHECKED_SYMBOL, dtype='<U2')
+    if obs_q:
+        field_idx = np.fromiter((field_pos[fid] for fid, _, _ in obs_q), dtype=np.intp, count=len(obs_q))
+        list_idx = np.fromiter((listing_pos[lid] for _, lid, _ in obs_q), dtype=np.intp, count=len(obs_q))
+        filled_arr = np.fromiter((filled for _, _, filled in obs_q), dtype=bool, count=len(obs_q))
+        matrix[field_idx, list_idx] = np.where(filled_arr, SYMBOL[True], SYMBOL[False])
 
     # summary formula columns
     n_listings = len(listings)
@@ -283,8 +451,6 @@ def export_google_sheet_symbols():
     last_listing_col = 1 + n_listings
     filled_col_idx = last_listing_col + 1
     empty_col_idx = last_listing_col + 2
-    pct_col_idx = last_listing_col + 3
-    remove_col_idx = last_listing_col + 4
 
     def col_idx_to_letter(idx):
         letters = ''
@@ -295,28 +461,46 @@ def export_google_sheet_symbols():
 
     filled_col_letter = col_idx_to_letter(filled_col_idx)
     empty_col_letter = col_idx_to_letter(empty_col_idx)
-    pct_col_letter = col_idx_to_letter(pct_col_idx)
-    remove_col_letter = col_idx_to_letter(remove_col_idx)
     first_list_col_letter = col_idx_to_letter(first_listing_col)
     last_list_col_letter = col_idx_to_letter(last_listing_col)
 
-    for i in range(len(rows)):
-        row_num = 2 + i
-        list_range = f"{first_list_col_letter}{row_num}:{last_list_col_letter}{row_num}"
-        filled_formula = f'=COUNTIF({list_range},"✔️")'
-        empty_formula = f'=COUNTIF({list_range},"✖️")'
-        pct_formula = f'=IF(({filled_col_letter}{row_num}+{empty_col_letter}{row_num})=0,0,{empty_col_letter}{row_num}/({filled_col_letter}{row_num}+{empty_col_letter}{row_num}))'
-        remove_formula = f'=IF(AND({empty_col_letter}{row_num}>=6,({filled_col_letter}{row_num}+{empty_col_letter}{row_num})>=10),"YES","NO")'
+    # formula templates are built once; only the row number {r} varies per row
+    list_range = f"{first_list_col_letter}{{r}}:{last_list_col_letter}{{r}}"
+    filled_tmpl = f'=COUNTIF({list_range},"{SYMBOL[True]}")'
+    empty_tmpl = f'=COUNTIF({list_range},"{SYMBOL[False]}")'
+    pct_tmpl = f'=IF(({filled_col_letter}{{r}}+{empty_col_letter}{{r}})=0,0,{empty_col_letter}{{r}}/({filled_col_letter}{{r}}+{empty_col_letter}{{r}}))'
+    remove_tmpl = f'=IF(AND({empty_col_letter}{{r}}>=6,({filled_col_letter}{{r}}+{empty_col_letter}{{r}})>=10),"YES","NO")'
+    row_nums = range(2, 2 + len(fields))
+
+    # field names are free text and the sheet is written USER_ENTERED, so force them to literal
+    # text with a leading ' (not displayed by Sheets); otherwise '=1+1' becomes a formula and
+    # '0012' a number. Escaping is off below so only the four template columns are formulas.
+    field_names = ["'" + f.canonical for f in fields]
+    df = pd.DataFrame(matrix, index=pd.Index(field_names, name='Field Name'), columns=listing_headers)
+    df[summary_headers[0]] = [filled_tmpl.format(r=r) for r in row_nums]
+    df[summary_headers[1]] = [empty_tmpl.format(r=r) for r in row_nums]
+    df[summary_headers[2]] = [pct_tmpl.format(r=r) for r in row_nums]
+    df[summary_headers[3]] = [remove_tmpl.format(r=r) for r in row_nums]
+
+    try:
         try:
-            ws.update_acell(f'{filled_col_letter}{row_num}', filled_formula)
-            ws.update_acell(f'{empty_col_letter}{row_num}', empty_formula)
-            ws.update_acell(f'{pct_col_letter}{row_num}', pct_formula)
-            ws.update_acell(f'{remove_col_letter}{row_num}', remove_formula)
-        except Exception as e:
-            return f"error writing formulas at row {row_num}: {e}", 500
+            ws = sh.worksheet('Single Family')
+            sh.del_worksheet(ws)
+        except Exception:
+            pass
+        num_rows = max(100, len(fields) + 10)
+        ws = sh.add_worksheet(title='Single Family', rows=str(num_rows), cols=str(num_cols))
+    except Exception as e:
+        return f"sheet creation error: {e}", 500
+
+    # header, symbol matrix and summary formulas go out in a single write
+    try:
+        set_with_dataframe(ws, df, include_index=True, string_escaping='off')
+    except Exception as e:
+        return f"error writing rows: {e}", 500
 
     # optionally set percent format via gspread-formatting if needed (not included)
-    return f"Exported {len(rows)} fields for {n_listings} listings to sheet {sheet_id} (tab 'Single Family')", 200
+    return f"Exported {len(fields)} fields for {n_listings} listings to sheet {sheet_id} (tab 'Single Family')", 200
 
 # --- HTML templates (inline strings) ---
 INDEX_HTML = """
@@ -367,12 +551,24 @@ document.getElementById('start_add').onclick = ()=>{
   document.getElementById('entry_area').style.display='block';
 }
 const fieldInput = document.getElementById('field_input');
-fieldInput.addEventListener('input', async (e)=>{
-  const q = fieldInput.value;
-  const res = await fetch('/api/fields?q='+encodeURIComponent(q));
-  const data = await res.json();
+// debounce suggestions and cancel any request still in flight
+let suggestTimer, suggestCtrl;
+fieldInput.addEventListener('input', (e)=>{
+  clearTimeout(suggestTimer);
+  if(suggestCtrl) suggestCtrl.abort();
+  const q = fieldInput.value.trim();
   const s = document.getElementById('suggestions');
-  s.innerHTML = data.map(d=>`<div><a href="#" onclick="pickSuggestion('${escapeHtml(d.canonical)}');return false">${escapeHtml(d.canonical)}</a></div>`).join('');
+  if(q.length < 2){ s.innerHTML=''; return; }
+  suggestTimer = setTimeout(async ()=>{
+    suggestCtrl = new AbortController();
+    try {
+      const res = await fetch('/api/fields?q='+encodeURIComponent(q), {signal: suggestCtrl.signal});
+      const data = await res.json();
+      s.innerHTML = data.map(d=>`<div><a href="#" onclick="pickSuggestion('${escapeHtml(d.canonical)}');return false">${escapeHtml(d.canonical)}</a></div>`).join('');
+    } catch(err) {
+      if(err.name !== 'AbortError') throw err;
+    }
+  }, 150);
 });
 function escapeHtml(s){ return s.replace(/&/g,'&amp;').replace(/"/g,'&quot;').replace(/</g,'&lt;').replace(/>/g,'&gt;');}
 function pickSuggestion(name){
@@ -387,6 +583,8 @@ function addTagFromInput(){
   tags.push({name, filled:true});
   renderTags();
   fieldInput.value='';
+  clearTimeout(suggestTimer);
+  if(suggestCtrl) suggestCtrl.abort();
   document.getElementById('suggestions').innerHTML='';
 }
 function renderTags(){